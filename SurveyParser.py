@@ -12,7 +12,6 @@ Created on Sun Dec 13 10:58:25 2020
 ####################
 import os
 from tkinter import Tk, filedialog
-from statistics import mean, stdev
 import numpy as np
 import pandas as pd
 
@@ -22,6 +21,7 @@ import pandas as pd
 
 # General
 NA_LIST = [np.nan, 'NA', 'na', 'N/A', 'n/a', 'N/a', 'nan', '']
+NA_SET = frozenset(x for x in NA_LIST if isinstance(x, str))
 
 # Rows containing actual students in the Canvas gradebook csv
 GB_HEAD = 0
@@ -31,6 +31,10 @@ GB_KEEP_COLS = ['Student', 'ID', 'SIS User ID', 'SIS Login ID',
                    'Root Account', 'Section']
 GB_SID = 'SIS Login ID'
 
+# Prefix of the survey map student labels for peer evaluations
+#   (e.g., 'peer1', 'peer2')
+PEER_PREFIX = 'peer'
+
 # Survey Response sheet map
 survey_sheets = {
     'responses'     : {
@@ -69,13 +73,31 @@ def split_email(email):
     student_id : str
         Student university ID
     '''
-    student_id = email.split('@')[0].lower()
+    student_id = email.split('@', 1)[0].lower()
     return student_id
 
-def add_empty_cols(dataframe, cols):
-    # Adds empty columns with designated headers to the dataframe
+def split_emails(emails):
+    '''
+    Splits student IDs off of a Series of student email addresses
+
+    Parameters
+    ----------
+    emails : pandas.Series
+        Student university email addresses
+
+    Returns
+    -------
+    student_ids : pandas.Series
+        Student university IDs
+    '''
+    student_ids = emails.str.split('@', n=1).str[0].str.lower()
+    return student_ids
+
+def add_empty_cols(dataframe, cols, dtypes):
+    # Adds empty columns with designated headers to the dataframe, filled
+    #   with missing values of the column's type in dtypes
     for col in cols:
-        dataframe[col]=''
+        dataframe[col] = pd.Series(index=dataframe.index, dtype=dtypes[col])
     return dataframe
 
 
@@ -121,9 +143,11 @@ def unique_peers(survey_map):
         List of unique peers from the survey map.
 
     '''
-    peer_list = list(set(list(survey_map[
-        survey_map['student'].str.contains(r'peer')].loc[:,'student'])))
-    peer_list.sort()
+    # Read the peers from the student categories (set in prep_map)
+    students = survey_map['student'].astype('category')
+    peer_list = sorted(
+        c for c in students.cat.categories
+        if isinstance(c, str) and c.startswith(PEER_PREFIX))
     return peer_list
 
 
@@ -132,8 +156,35 @@ def first_peer(survey_map):
     return firstpeer
 
 
+def map_groups(survey_map):
+    '''
+    Groups the survey map rows by student and category
+
+    Build the groups once per survey map and pass them to find_columns so
+    that repeated column lookups do not rescan the map.
+
+    Parameters
+    ----------
+    survey_map : pandas.DataFrame
+        DataFrame that maps survey questions to categories.
+
+    Returns
+    -------
+    groups : dict
+        Dictionary mapping (student, category) to the survey map row labels
+        in that group. (student, 'any') maps to all rows for the student.
+
+    '''
+    groups = dict(survey_map.groupby(
+        ['student', 'category'], observed=True).groups)
+    for student, rows in survey_map.groupby(
+            'student', observed=True).groups.items():
+        groups[(student, 'any')] = rows
+    return groups
+
+
 def find_columns(survey_map, student, category='any', map_col = 'newhead',
-                prefix=False, suffix=False):
+                prefix=False, suffix=False, groups=None):
     '''
     Finds and returns names of columns based on input parameters
 
@@ -156,6 +207,9 @@ def find_columns(survey_map, student, category='any', map_col = 'newhead',
     suffix: str, optional
         Use this option to add a suffix to the column headers,
         e.g., 'avg' becomes 'Column Name (avg)'. The default is False.
+    groups : dict, optional
+        Survey map row groups from map_groups. The default is None, which
+        groups the survey map for this call only.
 
     Returns
     -------
@@ -163,13 +217,10 @@ def find_columns(survey_map, student, category='any', map_col = 'newhead',
         List of column names.
 
     '''
-    if category != 'any':
-        cols = list(survey_map[
-            (survey_map.student.str.contains(student))
-            & (survey_map.category.str.contains(category))][map_col])
-    else:
-        cols = list(survey_map[
-            (survey_map.student.str.contains(student))][map_col])
+    if groups is None:
+        groups = map_groups(survey_map)
+    rows = groups.get((student, category), [])
+    cols = list(survey_map.loc[rows, map_col])
     cols = [col for col in cols if str(col) != 'nan']
     if prefix:
         cols = add_prefix_suffix(cols, prefix, 'p')
@@ -189,7 +240,7 @@ def gen_pe_rating_columns(rating_cols):
 # FILE IMPORT & PREPROCESSING
 ##########
 def import_sheet(text='Select file', directory=os.getcwd(), filetype='csv',
-                header=0, xls_sheet_map=[]):
+                header=0, xls_sheet_map=[], usecols=None, dtype=None):
     '''
     Imports spreadsheet file as a pandas DataFrame
 
@@ -210,6 +261,12 @@ def import_sheet(text='Select file', directory=os.getcwd(), filetype='csv',
         names to load as dictionary names, with sub-dictionaries containing
         'name' (the name of the variable to map to the sheet) and
         'header' (the header row for the sheet). The default is [].
+    usecols : list of str, optional
+        Columns to load from a csv file. Other columns are skipped by the
+        parser. The default is None, which loads all columns.
+    dtype : type or dict, optional
+        Data type(s) to use for the columns of a csv file.
+        The default is None, which lets pandas infer the types.
 
     Returns
     -------
@@ -232,17 +289,20 @@ def import_sheet(text='Select file', directory=os.getcwd(), filetype='csv',
     root.destroy()
     # Load and return the file
     if filetype=='csv':
-        data = pd.read_csv(fpath, sep=',', header=header)
+        data = pd.read_csv(fpath, sep=',', header=header, usecols=usecols,
+                           dtype=dtype)
     elif filetype=='xls':
-        if not xls_sheet_map:
-            data = pd.read_excel(filepath, header=header)
-        else:
-            data = {}
-            for sheet in xls_sheet_map:
-                sheet_info = xls_sheet_map[sheet]
-                data[sheet] = pd.read_excel(
-                    filepath, sheet_name=sheet_info['sheet'],
-                    header = sheet_info['header'])
+        # Open the workbook once and parse each sheet from it
+        with pd.ExcelFile(fpath) as workbook:
+            if not xls_sheet_map:
+                data = workbook.parse(header=header)
+            else:
+                data = {}
+                for sheet in xls_sheet_map:
+                    sheet_info = xls_sheet_map[sheet]
+                    data[sheet] = workbook.parse(
+                        sheet_name=sheet_info['sheet'],
+                        header = sheet_info['header'])
 
     return data, fpath
 
@@ -253,11 +313,8 @@ def prep_gradebook(grade_book):
         grade_book.iloc[GB_FIRSTROW:GB_LASTROW][GB_KEEP_COLS])
 
     # Add an unformatted name column
-    namelist = []
-    for name in grade_book['Student']:
-        name_split = name.split(', ')
-        namelist.append(' '.join((name_split[1], name_split[0])))
-    grade_book['Name'] = namelist
+    name_split = grade_book['Student'].str.split(', ')
+    grade_book['Name'] = name_split.str[1] + ' ' + name_split.str[0]
 
     return grade_book
 
@@ -265,6 +322,8 @@ def prep_gradebook(grade_book):
 def prep_map(survey_results, survey_map):
     # Remap the map with the imported column names
     survey_map['survey_column'] = survey_results.columns
+    # Store the student labels as categories for cheap peer lookups
+    survey_map['student'] = survey_map['student'].astype('category')
     return survey_map
 
 
@@ -295,49 +354,65 @@ def process_self_evals(grade_book, survey_results, survey_map, map_points):
     '''
 
     # Make list of self-evaluation questions (include general info)
-    cols_self = (find_columns(survey_map, 'self', map_col='survey_column')
-                 + find_columns(survey_map, 'general', map_col='survey_column'))
+    groups = map_groups(survey_map)
+    peers = unique_peers(survey_map)
+    cols_self = (
+        find_columns(survey_map, 'self', map_col='survey_column', groups=groups)
+        + find_columns(survey_map, 'general', map_col='survey_column',
+                       groups=groups))
     evals_self = survey_results.loc[:,cols_self].copy()
-    evals_self.columns = (find_columns(survey_map, 'self', prefix='SE')
-                          + find_columns(survey_map, 'general'))
-
-    # Add the self-evaluation columns to the gradebook
-    grade_book = add_empty_cols(grade_book, evals_self.columns)
+    evals_self.columns = (
+        find_columns(survey_map, 'self', prefix='SE', groups=groups)
+        + find_columns(survey_map, 'general', groups=groups))
 
     # Convert ratings to points
-    rating_cols = find_columns(survey_map, 'self', 'rating', prefix='SE')
-    evals_self.loc[:,rating_cols] = convert_ratings(
+    rating_cols = find_columns(survey_map, 'self', 'rating', prefix='SE',
+                               groups=groups)
+    evals_self[rating_cols] = convert_ratings(
         map_points, evals_self[rating_cols])
 
     # Identify student based on university email address (login ID)
-    # and fill in self-evaluation data
+    sid_set = set(grade_book[GB_SID].dropna())
+    name_set = set(grade_book['Name'])
+    name_lookup = dict(zip(fix_names(grade_book['Name']), grade_book['Name']))
+    # Gradebook rows for each login ID and name
+    sid_to_row = dict(zip(grade_book[GB_SID], grade_book.index))
+    name_to_rows = grade_book.index.groupby(grade_book['Name'])
     # Find the survey column that contains the reporting student's email address
-    [col_email] = find_columns(survey_map,'self','email', prefix = 'SE')
-    list_emails = evals_self[col_email]
-    for email in list_emails:
-        # Split out the student ID and match in the gradebook
-        student_id = split_email(email)
-        if student_id in list(grade_book[GB_SID]):
-            grade_book.loc[
-                grade_book[GB_SID]==student_id,
-                evals_self.columns] = (
-                    evals_self.loc[evals_self[col_email]==email].values)
-        else:
-            [student_name] = evals_self.loc[evals_self[col_email]==email,'SE: Name']
-            student_name = fix_name(student_name)
-            if student_name not in list(grade_book['Name']):
-                eval_row = survey_results.loc[survey_results[find_columns(
-                    survey_map, 'self', 'email',
-                    map_col='survey_column')[0]]==email].copy()
-                student_name = find_student(grade_book, survey_map, eval_row, 'self')
-            if student_name not in NA_LIST:
-                grade_book.loc[
-                    grade_book['Name']==student_name,
-                evals_self.columns] = (
-                    evals_self.loc[evals_self[col_email]==email].values)
-    # Check gradebook for missing values and enter nan
-    check_cols = rating_cols + find_columns(survey_map, 'self', 'score', prefix='SE')
-    grade_book.loc[:,check_cols]=grade_book[check_cols].replace('', np.nan)
+    [col_email] = find_columns(survey_map,'self','email', prefix = 'SE',
+                               groups=groups)
+    student_ids = split_emails(evals_self[col_email])
+    matched = student_ids.isin(sid_set)
+    resolved = {i: [sid_to_row[sid]] for i, sid in student_ids[matched].items()}
+    # Fall back to the student's name for the remaining evaluations
+    fixed_names = fix_names(evals_self.loc[~matched, 'SE: Name'])
+    for i in fixed_names.index:
+        student_name = name_lookup.get(fixed_names[i], fixed_names[i])
+        if student_name not in name_set:
+            eval_row = survey_results.loc[i].copy()
+            student_name = find_student(
+                grade_book, survey_map, eval_row, 'self', groups, peers)
+        resolved[i] = list(name_to_rows.get(student_name, []))
+
+    # Fill in all self-evaluation data with a single join on the gradebook
+    #   rows (if a student submitted more than once, the last submission is
+    #   kept)
+    eval_rows = []
+    gb_rows = []
+    for i in evals_self.index:
+        for row in resolved.get(i, []):
+            eval_rows.append(i)
+            gb_rows.append(row)
+    evals_self = evals_self.loc[eval_rows].set_axis(
+        pd.Index(gb_rows, dtype=grade_book.index.dtype))
+    evals_self = evals_self[~evals_self.index.duplicated(keep='last')]
+    # Survey columns that share a gradebook column's name replace it in place
+    overlap = evals_self.columns.intersection(grade_book.columns)
+    out_cols = list(grade_book.columns) + [
+        col for col in evals_self.columns if col not in overlap]
+    grade_book = grade_book.drop(columns=overlap)
+    grade_book = grade_book.join(evals_self)
+    grade_book = grade_book.reindex(columns=out_cols)
 
     return grade_book
 
@@ -365,116 +440,100 @@ def process_peer_evals(grade_book, survey_results, survey_map, map_points):
     '''
 
     # Make a list of all peer-evaluations
-    cols_peer_all = survey_map[survey_map['student'].str.contains(r'peer')]
-    all_peers = list(set(list(cols_peer_all['student'])))
-    firstpeer = first_peer(survey_map)
-    newcols_peers = list(
-        survey_map.loc[survey_map['student']==firstpeer,'newhead'])
-
-    evals_peer = pd.DataFrame(columns=['review_row'] + newcols_peers)
+    groups = map_groups(survey_map)
+    all_peers = unique_peers(survey_map)
+    firstpeer = all_peers[0]
+    newcols_peers = list(survey_map.loc[groups[(firstpeer, 'any')], 'newhead'])
+
+    # Stack the evaluations for every peer into a single array
+    review_rows = np.tile(survey_results.index.to_numpy(), len(all_peers))
+    peer_data = []
     for peer in all_peers:
-        peer_evals = survey_results.loc[
-            :,survey_map.loc[survey_map['student']==peer, 'survey_column']]
-        peer_evals = np.column_stack((peer_evals.index,peer_evals.values))
-        evals_peer = evals_peer.append(pd.DataFrame(
-            data=peer_evals, columns = evals_peer.columns), ignore_index=True)
+        peer_cols = survey_map.loc[groups[(peer, 'any')], 'survey_column']
+        peer_data.append(survey_results[peer_cols].to_numpy(dtype=object))
+    evals_peer = pd.DataFrame(
+        data=np.column_stack((review_rows, np.concatenate(peer_data))),
+        columns=['review_row'] + newcols_peers)
 
     # Add the peer evaluation columns to the gradebook
     pe_cols = {
         'general'   : ['PE: N'],
         'comments'  : find_columns(
-            survey_map, first_peer(survey_map), 'comments'),
+            survey_map, firstpeer, 'comments', groups=groups),
         'rating'    : find_columns(
-            survey_map, first_peer(survey_map), 'rating'),
+            survey_map, firstpeer, 'rating', groups=groups),
         'all'       : []
         }
     pe_cols['rating_avg'] = gen_pe_rating_columns(pe_cols['rating'])
     for col_set in [col_set for col_set in pe_cols if col_set not in ('rating', 'all')]:
         pe_cols['all'] = pe_cols['all'] + pe_cols[col_set]
 
-    grade_book = add_empty_cols(grade_book, pe_cols['all'])
-
-    # Set up the evaluation collection per student
-    evals_peer_compiled = {}
-    for student in list(grade_book['Name']):
-        evals_peer_compiled[student] = pd.DataFrame(columns=evals_peer.columns).copy()
-        evals_peer_compiled[student].drop_duplicates(inplace=True)
+    pe_dtypes = {col: 'Int64' for col in pe_cols['general']}
+    pe_dtypes.update({col: 'float64' for col in pe_cols['rating_avg']})
+    pe_dtypes.update({col: 'string' for col in pe_cols['comments']})
+    grade_book = add_empty_cols(grade_book, pe_cols['all'], pe_dtypes)
 
     # For the peer evalulations, try to identify student based on the entered
     #   first and last name
-    [col_peername] = find_columns(survey_map, first_peer(survey_map), 'name')
-    for peer_eval in evals_peer.index:
-        # Try to find the name in the gradebook
-        name = evals_peer.loc[peer_eval, col_peername]
-        if name in NA_LIST:
-            continue
-        if name not in list(grade_book['Name']):
-            name = fix_name(name)
-            if name not in list(grade_book['Name']):
-                eval_row = survey_results.loc[
-                    evals_peer.loc[peer_eval,'review_row']].copy()
-                name = find_student(grade_book, survey_map, eval_row, name)
-        if name == 'NA':
-            continue
-        # Add the evaluation to the compiled set
-        evals_peer_compiled[name] = evals_peer_compiled[name].append(
-            evals_peer.loc[peer_eval])
+    [col_peername] = find_columns(survey_map, firstpeer, 'name', groups=groups)
+    name_set = set(grade_book['Name'])
+    name_lookup = dict(zip(fix_names(grade_book['Name']), grade_book['Name']))
+    entered_names = evals_peer[col_peername]
+    fixed_names = fix_names(entered_names)
+    # Match names as entered, then after fixing spaces/capitalization
+    names = entered_names.where(
+        entered_names.isin(name_set), fixed_names.map(name_lookup))
+    # Ask about the remaining names
+    unresolved = names.isna() & ~entered_names.isin(NA_LIST)
+    for peer_eval in evals_peer.index[unresolved]:
+        eval_row = survey_results.loc[
+            evals_peer.loc[peer_eval,'review_row']].copy()
+        names[peer_eval] = find_student(
+            grade_book, survey_map, eval_row, fixed_names[peer_eval], groups,
+            all_peers)
+    matched = names.isin(name_set)
 
     # Calculate averages, compile comments, and add to gradebook
-    for student in evals_peer_compiled:
-        eval_df = evals_peer_compiled[student].copy()
-        if not eval_df.empty:
-            avgs=average_ratings(evals_peer_compiled[student].copy(), pe_cols,
-                               map_points)
-            grade_book.loc[grade_book['Name']==student, pe_cols['all']]=avgs.values
-
-    # Check gradebook for missing values and enter nan
-    grade_book.loc[:,pe_cols['all']]=grade_book[pe_cols['all']].replace('', np.nan)
+    # (the evaluations are grouped by student once and each statistic reads
+    #   the same group row indices)
+    ratings = convert_ratings(
+        map_points, evals_peer.loc[matched, pe_cols['rating']]).astype(float)
+    evals_matched = pd.concat(
+        [ratings, evals_peer.loc[matched, pe_cols['comments']]], axis=1)
+    grouped = evals_matched.groupby(names[matched])
+    avgs = pd.concat(
+        [grouped.size().rename('PE: N'),
+         grouped[pe_cols['comments']].agg(combine_comments),
+         grouped[pe_cols['rating']].mean().round(2).add_suffix(' (avg)'),
+         grouped[pe_cols['rating']].std(ddof=1).round(2).add_suffix(' (std)')],
+        axis=1)
+    has_evals = grade_book['Name'].isin(avgs.index)
+    grade_book.loc[has_evals, pe_cols['all']] = avgs.loc[
+        grade_book.loc[has_evals, 'Name'], pe_cols['all']].set_axis(
+            grade_book.index[has_evals])
 
     return grade_book
 
 
-def average_ratings(eval_df, pe_cols, map_points):
+def combine_comments(comments):
     '''
-    Compile multiple ratings into averages, stdevs, and combined comments
+    Combines the comments from multiple evaluations
 
     Parameters
     ----------
-    eval_df : pandas.DataFrame
-        DESCRIPTION.
-    pe_cols : list of str
-        List of all peer evaluation columns.
-    map_points : dict
-        Dictionary mapping rating responses to points.
+    comments : pandas.Series
+        Comments from the evaluations.
 
     Returns
     -------
-    avgs : pandas.DataFrame
-        Dataframe containing compiled responses.
+    combined : str or pandas.NA
+        All non-empty comments, separated by ' | ', or pandas.NA if there
+        are none.
 
     '''
-    # Create holder DataFrame
-    avgs = pd.DataFrame(columns=pe_cols['all'])
-    avgs.loc[0,'PE: N'] = eval_df.shape[0]
-
-    # Combine comments
-    for comment_col in pe_cols['comments']:
-        comments = list(eval_df[comment_col])
-        comments = [c for c in list(eval_df[comment_col]) if c not in NA_LIST]
-        avgs[comment_col] = ' | '.join(comments)
-
-    # Convert the ratings
-    ratings = convert_ratings(map_points, eval_df[pe_cols['rating']])
-
-    # Average the ratings
-    for c in pe_cols['rating']:
-        avgs[c + ' (avg)'] = round(mean(list(ratings[c])),2)
-        if avgs.loc[0,'PE: N']==1:
-            avgs[c + ' (std)'] = np.nan
-        else:
-            avgs[c + ' (std)'] = round(stdev(list(ratings[c])),2)
-
-    return avgs
+    comments = comments.dropna()
+    combined = ' | '.join(comments[~comments.isin(NA_SET)]) or pd.NA
+    return combined
 
 
 def convert_ratings(map_points, ratings):
@@ -494,32 +553,40 @@ def convert_ratings(map_points, ratings):
         Dataframe containing point values for the given ratings.
 
     '''
-    ratings=ratings.copy()
-    for i in ratings.index:
-        for c in ratings.columns:
-            ratings.loc[i,c] = map_points[ratings.loc[i,c]]
+    # Look up the points for each column in one pass
+    ratings = pd.DataFrame(
+        {c: ratings[c].map(map_points) for c in ratings.columns},
+        index=ratings.index)
     return ratings
 
 
 def calc_differences(grade_book, survey_map):
     # List columns
-    se_cols = find_columns(survey_map, 'self', 'rating')
-    pe_cols = find_columns(survey_map, first_peer(survey_map), 'rating')
-    match_cols = set(se_cols).intersection(pe_cols)
-    for col in match_cols:
-        diff_col_name = 'SE-PE: ' + col
-        grade_book[diff_col_name] = (
-            grade_book['SE: '+col] - grade_book[col + ' (avg)'])
+    groups = map_groups(survey_map)
+    se_cols = find_columns(survey_map, 'self', 'rating', groups=groups)
+    pe_cols = find_columns(survey_map, first_peer(survey_map), 'rating',
+                           groups=groups)
+    pe_set = set(pe_cols)
+    match_cols = [col for col in se_cols if col in pe_set]
+    # Subtract all of the matching columns at once
+    se_vals = grade_book[
+        add_prefix_suffix(match_cols, 'SE', 'p')].to_numpy(dtype=float)
+    pe_vals = grade_book[
+        add_prefix_suffix(match_cols, 'avg', 's')].to_numpy(dtype=float)
+    diffs = pd.DataFrame(
+        se_vals - pe_vals, index=grade_book.index,
+        columns=add_prefix_suffix(match_cols, 'SE-PE', 'p'))
+    grade_book = pd.concat([grade_book, diffs], axis=1)
     return grade_book
 
-def fix_name(name):
-    # Get rid of trailing/leading spaces
-    name = name.strip()
-    # Initial caps
-    name = ' '.join([name.capitalize() for name in name.split(' ')])
-    return name
+def fix_names(names):
+    # Get rid of trailing/leading spaces and set initial caps for a
+    # Series of names
+    names = names.str.strip().str.title()
+    return names
 
-def find_student(grade_book, survey_map, eval_row, student):
+def find_student(grade_book, survey_map, eval_row, student, groups=None,
+                 peers=None):
     '''
     When student cannot be automatically matched in the gradebook,
     prompt the user to enter the student's name based on other identifying
@@ -535,6 +602,12 @@ def find_student(grade_book, survey_map, eval_row, student):
         Extracted row from the evaluation filled out by the reviewing student.
     student : str
         'self' or a peer's name.
+    groups : dict, optional
+        Survey map row groups from map_groups. The default is None, which
+        groups the survey map here.
+    peers : list of str, optional
+        Peers from unique_peers. The default is None, which looks them up
+        in the survey map here.
 
     Returns
     -------
@@ -550,6 +623,10 @@ def find_student(grade_book, survey_map, eval_row, student):
     error_str = 'Student not found in gradebook: '
 
     # Find columns containing potentially identifying info
+    if groups is None:
+        groups = map_groups(survey_map)
+    if peers is None:
+        peers = unique_peers(survey_map)
     r_info = {
         'section'   : '',
         'team'      : '',
@@ -559,12 +636,13 @@ def find_student(grade_book, survey_map, eval_row, student):
     for category in r_info:
         r_info[category] = eval_row[
             find_columns(survey_map, 'self', category=category,
-                        map_col='survey_column')[0]]
+                        map_col='survey_column', groups=groups)[0]]
     peer_names = []
-    for peer in unique_peers(survey_map):
+    name_set = set(grade_book['Name'])
+    for peer in peers:
         peer_name = eval_row[
             find_columns(survey_map, peer, category='name',
-                        map_col='survey_column')[0]]
+                        map_col='survey_column', groups=groups)[0]]
         if not peer_name in NA_LIST:
             peer_names.append(peer_name)
 
@@ -578,7 +656,7 @@ def find_student(grade_book, survey_map, eval_row, student):
                  + '" in Section ' + r_info['section']
                  + ', Team ' + r_info['team']
                  + input_str_end)
-            if (name in list(grade_book['Name'])) or (name in NA_LIST):
+            if (name in name_set) or (name in NA_LIST):
                 break
             print(error_str + name)
 
@@ -593,7 +671,7 @@ def find_student(grade_book, survey_map, eval_row, student):
                 + '\nOther team members evaluated by this person: '
                 + r_info['name'] + ', ' + ', '.join(peer_names)
                 + input_str_end)
-            if (name in list(grade_book['Name'])) or (name in NA_LIST):
+            if (name in name_set) or (name in NA_LIST):
                 break
             print(error_str + name)
 
@@ -607,7 +685,8 @@ if __name__ == '__main__':
 
     # Import gradebook and survey response csv files
     gradebook, filepath = import_sheet(
-        text = 'Select Canvas gradebook file', header = GB_HEAD)
+        text = 'Select Canvas gradebook file', header = GB_HEAD,
+        usecols = GB_KEEP_COLS, dtype = {GB_SID: str})
     dirPath = os.path.dirname(filepath)
     survey_data, filepath = import_sheet(
         text='Select downloaded survey response file', directory=dirPath,